@@ -1,12 +1,53 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from sqlmodel import SQLModel, Field, Session, create_engine, select, or_, and_
-from sqlalchemy import Column, JSON
-from typing import Optional, List, Dict
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from pydantic import BaseModel, ConfigDict, TypeAdapter, field_validator
+from sqlalchemy import Column, JSON, Index, event, update, delete, func, text, tuple_, bindparam
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Optional, List, Dict, Union
 from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
 from pathlib import Path
-from sqlalchemy.exc import OperationalError
+from functools import lru_cache, wraps
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+import inspect
+import json
+import re
+import time
+import calendar
+from sqlalchemy.pool import QueuePool
+import ciso8601
+import orjson
+
+# 时区（全局复用，避免每次请求重复构造）
+SHANGHAI = ZoneInfo("Asia/Shanghai")
+
+def now_sh() -> datetime:
+    return datetime.now(SHANGHAI)
+
+
+# orjson 不支持超出 64 位的整数（dumps 报 TypeError，loads 会转成 float），
+# 上报的任意字段里可能出现，这种少见情况退回标准库 json 保持原值
+# 超出 64 位的整数至少有 19 位数字（最小的是 -2**63 - 1），按 19 位判断，宁可多走几次标准库
+_LONG_DIGITS = re.compile(r"\d{19}")
+
+def json_dumps(obj) -> bytes:
+    # OPT_UTC_Z：UTC 时间输出为 "...Z"，与 pydantic 序列化的格式一致
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_UTC_Z)
+    except TypeError:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+def json_loads(text):
+    if _LONG_DIGITS.search(text):
+        return json.loads(text)
+    return orjson.loads(text)
+
 
 # =====================================================
 # 数据库配置
@@ -18,63 +59,63 @@ BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)  # 如果不存在就创建
 
-# SQLite 数据库路径
-TODO_DB_URL = f"sqlite:///{DATA_DIR / 'todos.db'}"
-REMINDER_DB_URL = f"sqlite:///{DATA_DIR / 'reminders.db'}"
-BOOKMARK_DB_URL = f"sqlite:///{DATA_DIR / 'bookmarks.db'}"
-SERVER_STATUS_DB_URL = f"sqlite:///{DATA_DIR / 'server_status_v2.db'}"
-LEDGER_DB_URL = f"sqlite:///{DATA_DIR / 'ledger.db'}"
+# SQLite 数据库路径（所有表共用一个数据库文件）
+DB_URL = f"sqlite:///{DATA_DIR / 'app.db'}"
+# 服务器状态 / 记账接口使用异步驱动访问同一个数据库文件
+ASYNC_DB_URL = f"sqlite+aiosqlite:///{DATA_DIR / 'app.db'}"
+
+# 使用连接池复用连接（及其语句缓存），避免每个请求重新打开数据库文件
+DB_POOL_SIZE = 10
+
+engine = create_engine(
+    DB_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=20,
+    pool_pre_ping=False,             # 本地 SQLite 文件不会断线，无需每次借出前探测
+    pool_recycle=3600,
+    # JSON 列（Bookmark.tags / ServerStatus.extra）使用 orjson 编解码
+    json_serializer=lambda obj: json_dumps(obj).decode(),
+    json_deserializer=json_loads,
+)
 
-todo_engine = create_engine(TODO_DB_URL, connect_args={"check_same_thread": False})
-reminder_engine = create_engine(REMINDER_DB_URL, connect_args={"check_same_thread": False})
-bookmark_engine = create_engine(BOOKMARK_DB_URL, connect_args={"check_same_thread": False})
-server_status_engine = create_engine(SERVER_STATUS_DB_URL, connect_args={"check_same_thread": False})
-ledger_engine = create_engine(LEDGER_DB_URL, connect_args={"check_same_thread": False})
+async_engine = create_async_engine(
+    ASYNC_DB_URL,
+    json_serializer=lambda obj: json_dumps(obj).decode(),
+    json_deserializer=json_loads,
+)
 
-def get_todo_session():
-    try:
-        with Session(todo_engine) as session:
-            yield session
-    except OperationalError:
-        SQLModel.metadata.create_all(todo_engine, tables=[Todo.__table__])
-        with Session(todo_engine) as session:
-            yield session
-
-def get_reminder_session():
-    try:
-        with Session(reminder_engine) as session:
-            yield session
-    except OperationalError:
-        SQLModel.metadata.create_all(reminder_engine, tables=[Reminder.__table__])
-        with Session(reminder_engine) as session:
-            yield session
-
-def get_bookmark_session():
-    try:
-        with Session(bookmark_engine) as session:
-            yield session
-    except OperationalError:
-        SQLModel.metadata.create_all(bookmark_engine, tables=[Bookmark.__table__])
-        with Session(bookmark_engine) as session:
-            yield session
-
-def get_server_status_session():
-    try:
-        with Session(server_status_engine) as session:
-            yield session
-    except OperationalError:
-        SQLModel.metadata.create_all(server_status_engine, tables=[ServerStatus.__table__])
-        with Session(server_status_engine) as session:
-            yield session
-
-def get_ledger_session():
-    try:
-        with Session(ledger_engine) as session:
-            yield session
-    except OperationalError:
-        SQLModel.metadata.create_all(ledger_engine, tables=[Ledger.__table__])
-        with Session(ledger_engine) as session:
-            yield session
+# SQLite 连接参数：WAL 日志 + NORMAL 同步，读写互不阻塞，提交时不再每次完整 fsync
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",      # 64 MiB 页缓存
+    "PRAGMA mmap_size=268435456",    # 256 MiB 内存映射
+    "PRAGMA busy_timeout=5000",
+)
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+def get_session():
+    with Session(engine) as session:
+        yield session
+
+async def get_async_session():
+    # 提交后不过期对象，避免返回响应时触发异步上下文之外的延迟加载
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+# SQLite 同一时刻只允许一个写者：异步写接口先在应用层排队，
+# 拿到锁后才取连接开事务，等待期间不占用连接池，也不会在 SQLite 内部锁上空等
+_write_lock = asyncio.Lock()
 
 
 # =====================================================
@@ -82,6 +123,9 @@ def get_ledger_session():
 # =====================================================
 
 class Todo(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_todo_completed", "completed"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
 
     title: str
@@ -89,17 +133,37 @@ class Todo(SQLModel, table=True):
     priority: str = "medium"
     details: Optional[str] = None
 
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=now_sh)
     completed_at: Optional[datetime] = None
 
 
+class TodoUpdate(SQLModel):
+    """PUT /todos 的请求体：所有字段可选，仅更新请求中显式给出的字段"""
+    title: Optional[str] = None
+    completed: Optional[bool] = None
+    priority: Optional[str] = None
+    details: Optional[str] = None   # 允许显式传 null 清空
+
+    @field_validator("title", "completed", "priority")
+    @classmethod
+    def reject_null(cls, value):
+        # 这几列不可为空：省略表示不修改，显式 null 直接返回 422，而不是提交时报 IntegrityError
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
+
 class Reminder(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_reminder_due_processed", "processed", "remind_time"),
+        Index("ix_reminder_recurring", "recurring"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
 
     service: str
     content: str
 
-    type: str = "once"
+    type: str = Field(default="once", index=True)
     processed: bool = False
 
     due_time: Optional[date] = None
@@ -124,6 +188,11 @@ class Bookmark(SQLModel, table=True):
     created_at: date = Field(default_factory=date.today)
 
 class ServerStatus(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_serverstatus_server_time", "server_name", "received_at"),
+        Index("ix_serverstatus_received_at", "received_at"),
+        Index("uq_serverstatus_server_service", "server_name", "service_name", unique=True),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
 
     server_name: str          # 服务器名称
@@ -134,11 +203,34 @@ class ServerStatus(SQLModel, table=True):
     
     extra: Dict = Field(default_factory=dict, sa_column=Column(JSON)) # 其余任意字段
 
-    received_at: datetime = Field(default_factory=lambda: datetime.now(ZoneInfo("Asia/Shanghai")))
+    received_at: datetime = Field(default_factory=now_sh)
 
-class Ledger(SQLModel, table=True):
-    __tablename__ = "ledger_items"
-    id: Optional[int] = Field(default=None, primary_key=True)
+class ServerStatusIn(BaseModel):
+    """
+    服务器状态上报请求体
+    必填：
+      - server_name
+      - service_name
+      - content (服务内容)
+      - is_success（布尔值，或不区分大小写的 "true"/"false" 字符串）
+    可选：
+      - time（字符串或数字时间戳，数字按原值转成字符串保存；不传则默认当前时间）
+      - 任意其他字段（存入 extra）
+    """
+    model_config = ConfigDict(extra="allow")
+
+    server_name: str
+    service_name: str
+    content: str
+    is_success: bool
+    time: Optional[Union[str, int, float]] = None
+
+
+class LedgerIn(SQLModel):
+    """
+    POST / PUT /ledger 的请求体（非表模型，会完整校验，record_date 的 ISO 字符串在此解析为 date）
+    Ledger 表在此基础上增加 id、created_at
+    """
     item: str
     amount: float
     interest: float = 0.0
@@ -146,20 +238,178 @@ class Ledger(SQLModel, table=True):
     record_date: date = Field(default_factory=date.today)
     category: Optional[str] = None
     notes: Optional[str] = None
-    created_at: datetime = Field(default_factory=lambda: datetime.now(ZoneInfo("Asia/Shanghai")))
+
+class Ledger(LedgerIn, table=True):
+    __tablename__ = "ledger_items"
+    __table_args__ = (
+        # 列表按 record_date DESC, id DESC 排序，SQLite 可反向扫描该索引，无需额外排序
+        Index("ix_ledger_date_id", "record_date", "id"),
+    )
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: datetime = Field(default_factory=now_sh)
+
+class LedgerCursor(BaseModel):
+    after_date: date
+    after_id: int
+
+
+class LedgerPage(BaseModel):
+    """GET /ledger 的分页响应"""
+    items: List[Ledger]
+    next_cursor: Optional[LedgerCursor] = None
+
 
 class Asset(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     amount: float = 0.0
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(ZoneInfo("Asia/Shanghai")))
+    updated_at: datetime = Field(default_factory=now_sh)
 
 class Liability(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     amount: float = 0.0
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(ZoneInfo("Asia/Shanghai")))
+    updated_at: datetime = Field(default_factory=now_sh)
+
+class AmountIn(BaseModel):
+    """POST /asset、/liability 的请求体"""
+    amount: float
+
+# 常用查询语句预先构建，复用 SQLAlchemy 的编译缓存
+# 只读列表接口直接查询表（Core），返回行字典，不构造 ORM 对象
+STMT_ALL_TODOS = Todo.__table__.select()
+STMT_ALL_REMINDERS = Reminder.__table__.select().order_by(Reminder.due_time)
+STMT_ALL_BOOKMARKS = Bookmark.__table__.select()
+
+# 带条件的查询用 bindparam 占位，每次请求只传参数、追加 limit
+STMT_STATUS_LATEST = select(ServerStatus).order_by(ServerStatus.received_at.desc())
+STMT_STATUS_BY_SERVER = STMT_STATUS_LATEST.where(ServerStatus.server_name == bindparam("server_name"))
+STMT_LEDGER_PAGE = select(Ledger).order_by(Ledger.record_date.desc(), Ledger.id.desc())
+STMT_LEDGER_PAGE_AFTER = STMT_LEDGER_PAGE.where(
+    tuple_(Ledger.record_date, Ledger.id) < tuple_(
+        bindparam("after_date", type_=Ledger.__table__.c.record_date.type),
+        bindparam("after_id", type_=Ledger.__table__.c.id.type),
+    )
+)
 
-# Ensure table exists
-SQLModel.metadata.create_all(ledger_engine, tables=[Ledger.__table__, Asset.__table__, Liability.__table__])
+# 列表响应的序列化器只构建一次，dump_json 直接在 pydantic-core 中输出 bytes
+STATUS_LIST_ADAPTER = TypeAdapter(List[ServerStatus])
+LEDGER_PAGE_ADAPTER = TypeAdapter(LedgerPage)
+
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 序列化（原生支持 date / datetime），跳过 response_model 的再次校验"""
+    def render(self, content) -> bytes:
+        return json_dumps(content)
+
+# 旧版本按模块拆分的数据库文件 -> 其中包含的表
+LEGACY_DB_FILES = {
+    "todos.db": [Todo],
+    "reminders.db": [Reminder],
+    "bookmarks.db": [Bookmark],
+    "server_status_v2.db": [ServerStatus],
+    "ledger.db": [Ledger, Asset, Liability],
+}
+
+def migrate_legacy_databases():
+    """
+    将旧版的多个 SQLite 文件通过 ATTACH 导入 app.db（仅在目标表为空时导入），
+    导入完成后把旧文件重命名为 *.migrated，避免重复导入
+    """
+    for filename, models in LEGACY_DB_FILES.items():
+        legacy_path = DATA_DIR / filename
+        if not legacy_path.exists():
+            continue
+
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ATTACH DATABASE ? AS legacy", (str(legacy_path),))
+            try:
+                for model in models:
+                    table = model.__tablename__
+                    legacy_cols = {row[1] for row in conn.exec_driver_sql(f'PRAGMA legacy.table_info("{table}")')}
+                    if not legacy_cols:
+                        continue
+                    if conn.exec_driver_sql(f'SELECT 1 FROM main."{table}" LIMIT 1').first():
+                        continue
+                    cols = ", ".join(f'"{c.name}"' for c in model.__table__.columns if c.name in legacy_cols)
+                    # 旧数据可能违反新增的唯一索引（如重复的服务器状态），按 id 顺序导入，后写入的覆盖先写入的
+                    conn.exec_driver_sql(
+                        f'INSERT OR REPLACE INTO main."{table}" ({cols}) SELECT {cols} FROM legacy."{table}" ORDER BY id'
+                    )
+                conn.commit()
+            finally:
+                conn.exec_driver_sql("DETACH DATABASE legacy")
+
+        legacy_path.rename(legacy_path.with_name(filename + ".migrated"))
+
+
+def dedupe_server_status():
+    """唯一索引建立前，清理并发上报留下的重复 (server_name, service_name)，只保留最新一条"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "DELETE FROM serverstatus WHERE id NOT IN "
+            "(SELECT MAX(id) FROM serverstatus GROUP BY server_name, service_name)"
+        ))
+
+
+def create_indexes():
+    """create_all 不会给已存在的表补建索引，这里逐个检查并创建"""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def warm_up_pool():
+    """预先打开连接池中的连接（同时持有，确保是不同连接），PRAGMA 在此时一次性设置好"""
+    connections = [engine.connect() for _ in range(DB_POOL_SIZE)]
+    for conn in connections:
+        conn.execute(text("SELECT 1"))
+        conn.close()
+
+
+async def warm_up_async_pool():
+    """同上，预热状态 / 记账接口使用的异步连接池"""
+    connections = [await async_engine.connect() for _ in range(async_engine.pool.size())]
+    for conn in connections:
+        await conn.execute(text("SELECT 1"))
+        await conn.close()
+
+
+def ensure_singletons():
+    """确保资产/负债的单例行（id=1）存在，记账接口只需对其做增量 UPDATE"""
+    now = now_sh()
+    with engine.begin() as conn:
+        for model in (Asset, Liability):
+            conn.execute(
+                sqlite_insert(model.__table__)
+                .values(id=1, amount=0.0, updated_at=now)
+                .on_conflict_do_nothing()
+            )
+
+
+def migrate_reminders():
+    """
+    一次性数据清洗（启动时执行）：
+      - 旧的 daily 类型统一为 once + recurring + cycle_mode='daily'
+      - 确保所有 recurring 任务都有 due_time
+    """
+    today = now_sh().date()
+    # 两条 UPDATE 在同一事务中提交，只产生一次 fsync
+    with Session(engine) as session, session.begin():
+        session.exec(
+            update(Reminder)
+            .where(Reminder.type == 'daily')
+            .values(
+                type='once',
+                recurring=True,
+                cycle_mode='daily',
+                due_time=func.coalesce(Reminder.due_time, today),
+                remind_time=func.coalesce(Reminder.remind_time, today),
+            )
+        )
+        session.exec(
+            update(Reminder)
+            .where(Reminder.recurring.is_(True), Reminder.due_time.is_(None))
+            .values(due_time=today)
+        )
 
 
 # =====================================================
@@ -171,17 +421,15 @@ def parse_due_date(raw: str) -> date:
         raise ValueError("due_time is empty")
 
     raw = raw.strip()
-    if raw.endswith("Z"):
-        raw = raw.replace("Z", "+00:00")
-
     if len(raw) == 10:
         return date.fromisoformat(raw)
 
-    dt = datetime.fromisoformat(raw)
+    # ciso8601 为 C 实现，直接支持末尾的 Z
+    dt = ciso8601.parse_datetime(raw)
     if dt.tzinfo:
-        dt = dt.astimezone(ZoneInfo("Asia/Shanghai"))
+        dt = dt.astimezone(SHANGHAI)
     else:
-        dt = dt.replace(tzinfo=ZoneInfo("Asia/Shanghai"))
+        dt = dt.replace(tzinfo=SHANGHAI)
 
     return dt.date()
 
@@ -190,6 +438,11 @@ def parse_due_date(raw: str) -> date:
 # 循环提醒核心逻辑（重构后）
 # =====================================================
 
+@lru_cache(maxsize=2048)
+def last_day_of_month(year: int, month: int) -> int:
+    return calendar.monthrange(year, month)[1]
+
+
 def calc_next_due(reminder: Reminder, base_date: date) -> date:
     mode = reminder.cycle_mode
     
@@ -207,20 +460,15 @@ def calc_next_due(reminder: Reminder, base_date: date) -> date:
         # 简单的月份增加逻辑
         year = base_date.year + (1 if base_date.month == 12 else 0)
         month = 1 if base_date.month == 12 else base_date.month + 1
-        try:
-            return date(year, month, base_date.day)
-        except ValueError:
-            # 处理 1月31日 -> 2月28日 的情况：跳到下个月最后一天
-            import calendar
-            last_day = calendar.monthrange(year, month)[1]
-            return date(year, month, last_day)
+        # 处理 1月31日 -> 2月28日 的情况：超出则取下个月最后一天
+        day = min(base_date.day, last_day_of_month(year, month))
+        return date(year, month, day)
             
     elif mode == 'yearly':
-        try:
-            return date(base_date.year + 1, base_date.month, base_date.day)
-        except ValueError:
-            # 闰年 2月29日 -> 平年 2月28日
-            return date(base_date.year + 1, 2, 28)
+        # 闰年 2月29日 -> 平年 2月28日
+        year = base_date.year + 1
+        day = min(base_date.day, last_day_of_month(year, base_date.month))
+        return date(year, base_date.month, day)
             
     elif mode == 'days': # 自定义天数
         days = reminder.cycle_days or 1
@@ -230,11 +478,136 @@ def calc_next_due(reminder: Reminder, base_date: date) -> date:
     return base_date + timedelta(days=1)
 
 
+# =====================================================
+# 响应缓存（进程内，读多写少的接口使用）
+# =====================================================
+
+class ResponseCache:
+    """
+    简单的 TTL 缓存，保存已序列化好的 JSON bytes 及其 ETag
+    generation 在每次失效时递增：读取期间如果发生了写入，本次结果不写入缓存，避免缓存旧数据
+    缓存键包含任意查询参数（server_name、游标等），条目数达到 max_entries 时先清理过期条目，
+    仍然超出则按写入顺序淘汰最早的条目
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._data: Dict[str, tuple] = {}
+        self.max_entries = max_entries
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[tuple]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: tuple, expire: int, generation: int):
+        if generation != self.generation:
+            return
+        now = time.monotonic()
+        self._data.pop(key, None)
+        if len(self._data) >= self.max_entries:
+            self._evict(now)
+        self._data[key] = (now + expire, value)
+
+    def _evict(self, now: float):
+        for key in [k for k, (expires_at, _) in self._data.items() if expires_at < now]:
+            del self._data[key]
+        while len(self._data) >= self.max_entries:
+            del self._data[next(iter(self._data))]
+
+    def delete_prefix(self, *prefixes: str):
+        self.generation += 1
+        for key in [k for k in self._data if k.startswith(prefixes)]:
+            self._data.pop(key, None)
+
+
+cache = ResponseCache()
+
+
+def _orjson_default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError
+
+
+# 客户端协商缓存：每次都带 If-None-Match 回源校验，内容未变时返回 304
+# 不用 max-age，否则前端写入后立即刷新列表会直接读到浏览器里的旧数据
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def cached(prefix: str, expire: int):
+    """
+    缓存 GET 接口的响应；缓存键为 prefix + 查询参数（session 等依赖不参与）
+    写接口通过 cache.delete_prefix(prefix) 使其失效
+    响应带 ETag（响应体的 blake2b 摘要），If-None-Match 命中时直接返回 304
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(request: Request, **kwargs):
+            params = [f"{k}={v}" for k, v in sorted(kwargs.items()) if k != "session"]
+            key = ":".join([prefix, *params])
+
+            entry = cache.get(key)
+            if entry is None:
+                generation = cache.generation
+                result = await func(**kwargs)
+                # 接口自己已经序列化好的响应直接取 body 缓存
+                if isinstance(result, Response):
+                    body = result.body
+                else:
+                    body = orjson.dumps(result, default=_orjson_default, option=orjson.OPT_UTC_Z)
+                entry = (body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"')
+                cache.set(key, entry, expire, generation)
+
+            body, etag = entry
+            headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers=headers)
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        # 在原接口参数之外注入 Request，供 FastAPI 解析依赖时传入
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+        ])
+        return wrapper
+    return decorator
+
+
 # =====================================================
 # FastAPI 初始化
 # =====================================================
 
-app = FastAPI(docs_url=None, redoc_url=None)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动：建表、迁移、单例行，最后预热同步 / 异步两个连接池
+    SQLModel.metadata.create_all(engine)
+    dedupe_server_status()
+    create_indexes()
+    migrate_legacy_databases()
+    migrate_reminders()
+    ensure_singletons()
+    warm_up_pool()
+    await warm_up_async_pool()
+    yield
+    # 关闭：释放异步引擎的连接
+    await async_engine.dispose()
+
+
+app = FastAPI(docs_url=None, redoc_url=None, default_response_class=ORJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -244,27 +617,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.on_event("startup")
-def startup():
-    SQLModel.metadata.create_all(todo_engine, tables=[Todo.__table__])
-    SQLModel.metadata.create_all(reminder_engine, tables=[Reminder.__table__])
-    SQLModel.metadata.create_all(bookmark_engine, tables=[Bookmark.__table__])
-    SQLModel.metadata.create_all(server_status_engine, tables=[ServerStatus.__table__])
-    SQLModel.metadata.create_all(ledger_engine, tables=[Ledger.__table__])
-
-
 # =====================================================
 # Todo 接口
 # =====================================================
 
 @app.get("/todos", response_model=List[Todo])
-def get_todos(session: Session = Depends(get_todo_session)):
-    return session.exec(select(Todo)).all()
+def get_todos(session: Session = Depends(get_session)):
+    rows = session.exec(STMT_ALL_TODOS).mappings()
+    return ORJSONResponse([dict(row) for row in rows])
 
 
 @app.post("/todos", response_model=Todo)
-def create_todo(todo: Todo, session: Session = Depends(get_todo_session)):
-    todo.created_at = datetime.now(ZoneInfo("Asia/Shanghai"))
+def create_todo(todo: Todo, session: Session = Depends(get_session)):
+    todo.created_at = now_sh()
     session.add(todo)
     session.commit()
     session.refresh(todo)
@@ -272,39 +637,26 @@ def create_todo(todo: Todo, session: Session = Depends(get_todo_session)):
 
 
 @app.put("/todos/{todo_id}", response_model=Todo)
-def update_todo(todo_id: int, updated: Todo, session: Session = Depends(get_todo_session)):
+def update_todo(todo_id: int, updated: TodoUpdate, session: Session = Depends(get_session)):
     todo = session.get(Todo, todo_id)
     if not todo:
         raise HTTPException(404, "Todo not found")
 
     # 仅在请求中显式包含对应字段时才更新，避免未包含字段被意外清空（例如完成操作未包含 details）
-    fields_set = getattr(updated, '__fields_set__', None)
-
-    if fields_set is None or 'title' in fields_set:
-        todo.title = updated.title
-
-    if fields_set is None or 'completed' in fields_set:
-        todo.completed = updated.completed
-
-    if fields_set is None or 'priority' in fields_set:
-        todo.priority = updated.priority
-
-    if fields_set is None or 'details' in fields_set:
-        # 支持显式设置为 None 来清空 details
-        todo.details = updated.details
+    # 显式传入 None 的字段（如 details）同样会被更新，用于清空
+    todo.sqlmodel_update(updated.model_dump(exclude_unset=True))
 
-    # completed_at 由完成状态决定；如果前端提供 completed_at，尝试解析并使用它
-    if (fields_set is None or 'completed' in fields_set) and updated.completed:
-        todo.completed_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-    elif (fields_set is None or 'completed' in fields_set) and not updated.completed:
-        todo.completed_at = None
+    # completed_at 由完成状态决定
+    if 'completed' in updated.model_fields_set:
+        todo.completed_at = now_sh() if todo.completed else None
 
     session.commit()
+    session.refresh(todo)
     return todo
 
 
 @app.delete("/todos/{todo_id}")
-def delete_todo(todo_id: int, session: Session = Depends(get_todo_session)):
+def delete_todo(todo_id: int, session: Session = Depends(get_session)):
     todo = session.get(Todo, todo_id)
     if not todo:
         raise HTTPException(404, "Todo not found")
@@ -318,39 +670,15 @@ def delete_todo(todo_id: int, session: Session = Depends(get_todo_session)):
 # =====================================================
 
 @app.get("/reminders", response_model=List[Reminder])
-def get_reminders(session: Session = Depends(get_reminder_session)):
-    # 移除自动刷新逻辑，保持数据纯净
-    # 仅做一次性数据清洗：确保所有 recurring 任务都有 due_time
-    today = datetime.now(ZoneInfo('Asia/Shanghai')).date()
-    reminders = session.exec(select(Reminder)).all()
-    
-    changed = False
-    for r in reminders:
-        # 迁移旧数据：daily 类型转为 recurring
-        if r.type == 'daily':
-            r.type = 'once' # 逻辑上统一为 once + recurring=True
-            r.recurring = True
-            r.cycle_mode = 'daily'
-            if not r.due_time:
-                r.due_time = today
-            if not r.remind_time:
-                r.remind_time = today
-            changed = True
-        
-        # 确保所有 recurring 任务都有 due_time
-        if r.recurring and not r.due_time:
-            r.due_time = today
-            changed = True
-            
-    if changed:
-        session.commit()
-        
-    return reminders
+def get_reminders(session: Session = Depends(get_session)):
+    # 数据清洗已在启动时的 migrate_reminders 中完成，这里只做读取
+    rows = session.exec(STMT_ALL_REMINDERS).mappings()
+    return ORJSONResponse([dict(row) for row in rows])
 
 
 @app.post("/reminders", response_model=Reminder)
-def create_reminder(data: Reminder, session: Session = Depends(get_reminder_session)):
-    today = datetime.now(ZoneInfo('Asia/Shanghai')).date()
+def create_reminder(data: Reminder, session: Session = Depends(get_session)):
+    today = now_sh().date()
     
     # 强制设置 created_at
     data.created_at = today
@@ -375,7 +703,6 @@ def create_reminder(data: Reminder, session: Session = Depends(get_reminder_sess
             data.remind_time = data.due_time - timedelta(days=adv)
         except Exception:
             # 如果解析失败，默认设为今天
-            today = datetime.now(ZoneInfo('Asia/Shanghai')).date()
             data.due_time = today
             data.remind_time = today
 
@@ -386,7 +713,7 @@ def create_reminder(data: Reminder, session: Session = Depends(get_reminder_sess
 
 
 @app.put("/reminders/{rid}", response_model=Reminder)
-def update_reminder(rid: int, payload: dict, session: Session = Depends(get_reminder_session)):
+def update_reminder(rid: int, payload: dict, session: Session = Depends(get_session)):
     r = session.get(Reminder, rid)
     if not r:
         raise HTTPException(404, "Reminder not found")
@@ -414,13 +741,14 @@ def update_reminder(rid: int, payload: dict, session: Session = Depends(get_remi
 
 
 @app.put("/reminders/{rid}/processed")
-def mark_processed(rid: int, session: Session = Depends(get_reminder_session)):
+def mark_processed(rid: int, session: Session = Depends(get_session)):
     r = session.get(Reminder, rid)
     if not r:
         raise HTTPException(404, "Reminder not found")
 
-    today = datetime.now(ZoneInfo('Asia/Shanghai')).date()
-    r.last_completed_date = today
+    today = now_sh().date()
+    # 所有字段变更收集到一条 UPDATE 语句中
+    values = {"last_completed_date": today}
 
     if r.recurring:
         # 循环任务：计算下一次时间
@@ -443,25 +771,26 @@ def mark_processed(rid: int, session: Session = Depends(get_reminder_session)):
         else:
             next_due = calc_next_due(r, base_due)
             
-        r.due_time = next_due
+        values["due_time"] = next_due
         
         # 更新提醒时间
         adv = r.advance_days or 0
-        r.remind_time = next_due - timedelta(days=adv)
+        values["remind_time"] = next_due - timedelta(days=adv)
         
-        r.processed = False # 保持未完成状态
+        values["processed"] = False # 保持未完成状态
         
     else:
         # 一次性任务
-        r.processed = True
+        values["processed"] = True
 
+    session.exec(update(Reminder).where(Reminder.id == rid).values(**values))
     session.commit()
     session.refresh(r)
     return r
 
 
 @app.delete("/reminders/{rid}")
-def delete_reminder(rid: int, session: Session = Depends(get_reminder_session)):
+def delete_reminder(rid: int, session: Session = Depends(get_session)):
     r = session.get(Reminder, rid)
     if not r:
         raise HTTPException(404, "Reminder not found")
@@ -474,14 +803,18 @@ def delete_reminder(rid: int, session: Session = Depends(get_reminder_session)):
 # Bookmark 接口
 # =====================================================
 
+_HTTP_PREFIXES = ("http://", "https://")
+
+
 @app.get("/bookmarks", response_model=List[Bookmark])
-def get_bookmarks(session: Session = Depends(get_bookmark_session)):
-    return session.exec(select(Bookmark)).all()
+def get_bookmarks(session: Session = Depends(get_session)):
+    rows = session.exec(STMT_ALL_BOOKMARKS).mappings()
+    return ORJSONResponse([dict(row) for row in rows])
 
 
 @app.post("/bookmarks", response_model=Bookmark)
-def create_bookmark(bm: Bookmark, session: Session = Depends(get_bookmark_session)):
-    if not bm.url.startswith(("http://", "https://")):
+def create_bookmark(bm: Bookmark, session: Session = Depends(get_session)):
+    if not bm.url.startswith(_HTTP_PREFIXES):
         bm.url = "https://" + bm.url
 
     session.add(bm)
@@ -491,7 +824,7 @@ def create_bookmark(bm: Bookmark, session: Session = Depends(get_bookmark_sessio
 
 
 @app.put("/bookmarks/{bid}", response_model=Bookmark)
-def update_bookmark(bid: int, payload: dict, session: Session = Depends(get_bookmark_session)):
+def update_bookmark(bid: int, payload: dict, session: Session = Depends(get_session)):
     b = session.get(Bookmark, bid)
     if not b:
         raise HTTPException(404, "Bookmark not found")
@@ -500,7 +833,7 @@ def update_bookmark(bid: int, payload: dict, session: Session = Depends(get_book
         b.title = payload['title']
     if 'url' in payload:
         url = payload['url']
-        if not url.startswith(("http://", "https://")):
+        if not url.startswith(_HTTP_PREFIXES):
             url = "https://" + url
         b.url = url
     if 'description' in payload:
@@ -517,7 +850,7 @@ def update_bookmark(bid: int, payload: dict, session: Session = Depends(get_book
 
 
 @app.delete("/bookmarks/{bid}")
-def delete_bookmark(bid: int, session: Session = Depends(get_bookmark_session)):
+def delete_bookmark(bid: int, session: Session = Depends(get_session)):
     b = session.get(Bookmark, bid)
     if not b:
         raise HTTPException(404, "Bookmark not found")
@@ -529,292 +862,243 @@ def delete_bookmark(bid: int, session: Session = Depends(get_bookmark_session)):
 # # 服务器状态上报 接口
 # =====================================================
 
+def status_values(payload: ServerStatusIn, now: datetime) -> dict:
+    """将一条状态上报转换为 ServerStatus 的列值，now 同时用作默认 time 与 received_at"""
+    return {
+        "server_name": payload.server_name,
+        "service_name": payload.service_name,
+        "content": payload.content,
+        "is_success": payload.is_success,
+        "time": now.isoformat() if payload.time is None else str(payload.time),
+        "extra": payload.model_extra or {},  # 其余字段作为 extra
+        "received_at": now,
+    }
+
+
+def upsert_server_status_stmt():
+    """按 (server_name, service_name) 插入或覆盖一条状态，单条 SQL 完成，无读-改-写竞争"""
+    stmt = sqlite_insert(ServerStatus)
+    return stmt.on_conflict_do_update(
+        index_elements=["server_name", "service_name"],
+        set_={col: stmt.excluded[col] for col in ("content", "is_success", "time", "extra", "received_at")},
+    )
+
+
 @app.post("/server/status", response_model=ServerStatus)
-def receive_server_status(payload: dict, session: Session = Depends(get_server_status_session)):
+async def receive_server_status(payload: ServerStatusIn, session: AsyncSession = Depends(get_async_session)):
     """
-    接收服务器状态上报
-    必填：
-      - server_name
-      - service_name
-      - content (服务内容)
-      - is_success
-    可选：
-      - time（不传则默认当前时间）
-      - 任意其他字段（存入 extra）
+    接收服务器状态上报（字段说明见 ServerStatusIn）
     """
-    # 必填字段检查
-    required_fields = ["server_name", "service_name", "content", "is_success"]
-    for field in required_fields:
-        if field not in payload:
-            raise HTTPException(status_code=400, detail=f"Missing field: {field}")
-    
-    # 提取标准字段
-    server_name = payload.pop("server_name")
-    service_name = payload.pop("service_name")
-    content = payload.pop("content")
-    
-    raw_is_success = payload.pop("is_success")
-    if isinstance(raw_is_success, bool):
-        is_success = raw_is_success
-    elif isinstance(raw_is_success, str) and raw_is_success.lower() in ("true", "false"):
-        is_success = raw_is_success.lower() == "true"
-    else:
-        raise HTTPException(status_code=400, detail="is_success must be true or false (case-insensitive)")
-
-    time_val = payload.pop("time", datetime.now(ZoneInfo("Asia/Shanghai")).isoformat())
-
-    # 剩余字段作为 extra
-    extra_info = payload
-
-    # Check for existing record with same server_name and service_name
-    stmt = select(ServerStatus).where(
-        ServerStatus.server_name == server_name,
-        ServerStatus.service_name == service_name
-    )
-    
-    existing_status = session.exec(stmt).first()
-
-    if existing_status:
-        existing_status.content = content
-        existing_status.is_success = is_success
-        existing_status.time = time_val
-        existing_status.extra = extra_info
-        existing_status.received_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-        session.add(existing_status)
-        session.commit()
-        session.refresh(existing_status)
-        return existing_status
-
-    status = ServerStatus(
-        server_name=server_name,
-        service_name=service_name,
-        content=content,
-        is_success=is_success,
-        time=time_val,
-        extra=extra_info
-    )
+    values = status_values(payload, now_sh())
 
-    session.add(status)
-    session.commit()
-    session.refresh(status)
+    async with _write_lock:
+        result = await session.exec(upsert_server_status_stmt().values(**values).returning(ServerStatus))
+        status = result.scalar_one()
+        await session.commit()
+    cache.delete_prefix("status")
     return status
 
 
-
-@app.get("/server/status", response_model=List[ServerStatus])
-def list_server_status(
+@app.post("/server/status/batch")
+async def receive_server_status_batch(payloads: List[ServerStatusIn], session: AsyncSession = Depends(get_async_session)):
+    """
+    批量接收状态上报：按 (server_name, service_name) 批量 upsert，
+    一个事务内用 executemany 完成
+    """
+    # 同一批次内相同服务只保留最后一条
+    now = now_sh()
+    rows = {}
+    for payload in payloads:
+        values = status_values(payload, now)
+        rows[(values["server_name"], values["service_name"])] = values
+
+    if rows:
+        async with _write_lock:
+            await session.exec(upsert_server_status_stmt(), params=list(rows.values()))
+            await session.commit()
+        cache.delete_prefix("status")
+    return {"message": "OK", "count": len(rows)}
+
+
+@app.get("/server/status")
+@cached(prefix="status", expire=10)
+async def list_server_status(
     server_name: Optional[str] = None,
-    limit: int = 100,
-    session: Session = Depends(get_server_status_session)
+    limit: int = Query(100, ge=1, le=500),
+    session: AsyncSession = Depends(get_async_session)
 ):
-    stmt = select(ServerStatus)
-
     if server_name:
-        stmt = stmt.where(ServerStatus.server_name == server_name)
+        stmt, params = STMT_STATUS_BY_SERVER, {"server_name": server_name}
+    else:
+        stmt, params = STMT_STATUS_LATEST, None
+
+    rows = (await session.exec(stmt.limit(limit), params=params)).all()
+    # 列表接口不走 response_model，避免逐行再做一次 Pydantic 校验
+    return Response(content=STATUS_LIST_ADAPTER.dump_json(rows), media_type="application/json")
 
 
-    stmt = stmt.order_by(ServerStatus.received_at.desc()).limit(limit)
-    return session.exec(stmt).all()
+@app.get("/ledger")
+@cached(prefix="ledger", expire=60)
+async def get_ledger(
+    after_date: Optional[date] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    session: AsyncSession = Depends(get_async_session)
+):
+    """
+    按 (record_date DESC, id DESC) 游标分页（keyset），每页最多 500 条
+    下一页传入上一页返回的 next_cursor（after_date + after_id）；最后一页 next_cursor 为 null
+    """
+    if (after_date is None) != (after_id is None):
+        raise HTTPException(422, "after_date and after_id must be given together")
 
+    if after_date is not None:
+        stmt, params = STMT_LEDGER_PAGE_AFTER, {"after_date": after_date, "after_id": after_id}
+    else:
+        stmt, params = STMT_LEDGER_PAGE, None
+
+    rows = (await session.exec(stmt.limit(limit), params=params)).all()
+
+    next_cursor = None
+    if len(rows) == limit:
+        last = rows[-1]
+        next_cursor = LedgerCursor(after_date=last.record_date, after_id=last.id)
+    # model_construct 不做校验，rows 已经是数据库取出的 Ledger 对象
+    page = LedgerPage.model_construct(items=rows, next_cursor=next_cursor)
+    return Response(content=LEDGER_PAGE_ADAPTER.dump_json(page), media_type="application/json")
+
+# record_type -> (资产方向, 负债方向, 是否计入利息)
+#   income:   Asset+
+#   expense:  Asset-
+#   debt_in:  Borrowing: Asset+, Liability+
+#   debt_out: Repayment: Asset-, Liability- (Principal only). Amount is Principal, Interest is Extra (Asset only).
+_LEDGER_EFFECT = {
+    "income": (1, 0, False),
+    "expense": (-1, 0, False),
+    "debt_in": (1, 1, False),
+    "debt_out": (-1, -1, True),
+}
+
+
+def ledger_deltas(record_type: str, amount: float, interest: Optional[float]) -> tuple[float, float]:
+    """一条记账记录对 (资产, 负债) 的影响"""
+    effect = _LEDGER_EFFECT.get(record_type)
+    if effect is None:
+        return 0.0, 0.0
+    asset_sign, liability_sign, use_interest = effect
+    extra = float(interest) if use_interest and interest else 0.0
+    return asset_sign * (amount + extra), liability_sign * amount
+
+
+async def apply_balance_deltas(session: AsyncSession, asset_delta: float, liability_delta: float):
+    """在数据库内原子地调整资产/负债余额（amount = amount + delta），无需先读出对象"""
+    now = now_sh()
+    await session.exec(
+        update(Asset).where(Asset.id == 1).values(amount=Asset.amount + asset_delta, updated_at=now)
+    )
+    await session.exec(
+        update(Liability).where(Liability.id == 1).values(amount=Liability.amount + liability_delta, updated_at=now)
+    )
 
-@app.get("/ledger", response_model=List[Ledger])
-def get_ledger(session: Session = Depends(get_ledger_session)):
-    return session.exec(select(Ledger).order_by(Ledger.record_date.desc(), Ledger.id.desc())).all()
 
 @app.post("/ledger", response_model=Ledger)
-def create_ledger(ledger: Ledger, session: Session = Depends(get_ledger_session)):
-    if isinstance(ledger.record_date, str):
-        ledger.record_date = date.fromisoformat(ledger.record_date)
-    
-    session.add(ledger)
-    
-    # Update Asset
-    asset = session.get(Asset, 1)
-    if not asset:
-        asset = Asset(id=1, amount=0.0)
-        session.add(asset)
-        
-    # Update Liability
-    liability = session.get(Liability, 1)
-    if not liability:
-        liability = Liability(id=1, amount=0.0)
-        session.add(liability)
-    
-    if ledger.record_type == "income":
-        asset.amount += ledger.amount
-    elif ledger.record_type == "expense":
-        asset.amount -= ledger.amount
-    elif ledger.record_type == "debt_in": # Borrowing: Asset+, Liability+
-        asset.amount += ledger.amount
-        liability.amount += ledger.amount
-    elif ledger.record_type == "debt_out": # Repayment: Asset-, Liability- (Principal only)
-        # User Request: Amount is Principal. Interest is Extra.
-        interest_val = float(ledger.interest) if ledger.interest else 0.0
-        asset.amount -= (ledger.amount + interest_val)
-        liability.amount -= ledger.amount
-        
-    asset.updated_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-    liability.updated_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-    
-    session.add(asset)
-    session.add(liability)
-    session.commit()
-    session.refresh(ledger)
+async def create_ledger(payload: LedgerIn, session: AsyncSession = Depends(get_async_session)):
+    ledger = Ledger.model_validate(payload)
+    asset_delta, liability_delta = ledger_deltas(ledger.record_type, ledger.amount, ledger.interest)
+
+    async with _write_lock:
+        session.add(ledger)
+        await apply_balance_deltas(session, asset_delta, liability_delta)
+        await session.commit()
+    cache.delete_prefix("ledger", "asset", "liability")
+    await session.refresh(ledger)
     return ledger
 
 @app.put("/ledger/{ledger_id}", response_model=Ledger)
-def update_ledger(ledger_id: int, updated: Ledger, session: Session = Depends(get_ledger_session)):
-    item = session.get(Ledger, ledger_id)
-    if not item:
-        raise HTTPException(404, "Ledger item not found")
-
-    # Revert old asset/liability impact
-    asset = session.get(Asset, 1)
-    if not asset:
-        asset = Asset(id=1, amount=0.0)
-        session.add(asset)
-        
-    liability = session.get(Liability, 1)
-    if not liability:
-        liability = Liability(id=1, amount=0.0)
-        session.add(liability)
-    
-    if item.record_type == "income":
-        asset.amount -= item.amount
-    elif item.record_type == "expense":
-        asset.amount += item.amount
-    elif item.record_type == "debt_in":
-        asset.amount -= item.amount
-        liability.amount -= item.amount
-    elif item.record_type == "debt_out":
-        interest_val = float(item.interest) if item.interest else 0.0
-        asset.amount += (item.amount + interest_val)
-        liability.amount += item.amount
-        
-    # Update fields
-    if isinstance(updated.record_date, str):
-        updated.record_date = date.fromisoformat(updated.record_date)
-
-    item.item = updated.item
-    item.amount = updated.amount
-    item.interest = updated.interest
-    item.record_type = updated.record_type
-    item.record_date = updated.record_date
-    item.category = updated.category
-    item.notes = updated.notes
-    
-    # Apply new asset/liability impact
-    if item.record_type == "income":
-        asset.amount += item.amount
-    elif item.record_type == "expense":
-        asset.amount -= item.amount
-    elif item.record_type == "debt_in":
-        asset.amount += item.amount
-        liability.amount += item.amount
-    elif item.record_type == "debt_out":
-        interest_val = float(item.interest) if item.interest else 0.0
-        asset.amount -= (item.amount + interest_val)
-        liability.amount -= item.amount
-        
-    asset.updated_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-    liability.updated_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-    
-    session.add(asset)
-    session.add(liability)
-    session.add(item)
-    session.commit()
-    session.refresh(item)
+async def update_ledger(ledger_id: int, updated: LedgerIn, session: AsyncSession = Depends(get_async_session)):
+    # 读旧记录到写回必须在同一把锁内，否则并发修改同一条会重复冲销余额
+    async with _write_lock:
+        item = await session.get(Ledger, ledger_id)
+        if not item:
+            raise HTTPException(404, "Ledger item not found")
+
+        # Revert old asset/liability impact
+        old_asset, old_liability = ledger_deltas(item.record_type, item.amount, item.interest)
+
+        # Apply new asset/liability impact
+        new_asset, new_liability = ledger_deltas(updated.record_type, updated.amount, updated.interest)
+        await apply_balance_deltas(session, new_asset - old_asset, new_liability - old_liability)
+
+        # 单条 UPDATE ... RETURNING 写入并取回更新后的记录
+        result = await session.exec(
+            update(Ledger)
+            .where(Ledger.id == ledger_id)
+            .values(**updated.model_dump())
+            .returning(Ledger)
+        )
+        item = result.scalar_one()
+        await session.commit()
+    cache.delete_prefix("ledger", "asset", "liability")
     return item
 
 @app.delete("/ledger/{ledger_id}")
-def delete_ledger(ledger_id: int, session: Session = Depends(get_ledger_session)):
-    ledger = session.get(Ledger, ledger_id)
-    if not ledger:
-        raise HTTPException(404, "Ledger item not found")
-    
-    # Revert Asset/Liability
-    asset = session.get(Asset, 1)
-    if not asset:
-        asset = Asset(id=1, amount=0.0)
-        session.add(asset)
-        
-    liability = session.get(Liability, 1)
-    if not liability:
-        liability = Liability(id=1, amount=0.0)
-        session.add(liability)
-
-    if ledger.record_type == "income":
-        asset.amount -= ledger.amount
-    elif ledger.record_type == "expense":
-        asset.amount += ledger.amount
-    elif ledger.record_type == "debt_in":
-        asset.amount -= ledger.amount
-        liability.amount -= ledger.amount
-    elif ledger.record_type == "debt_out":
-        interest_val = float(ledger.interest) if ledger.interest else 0.0
-        asset.amount += (ledger.amount + interest_val)
-        liability.amount += ledger.amount
-        
-    asset.updated_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-    liability.updated_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-    session.add(asset)
-    session.add(liability)
-
-    session.delete(ledger)
-    session.commit()
+async def delete_ledger(ledger_id: int, session: AsyncSession = Depends(get_async_session)):
+    async with _write_lock:
+        # DELETE ... RETURNING 一次完成删除并取回被删记录，无需先 SELECT
+        result = await session.exec(
+            delete(Ledger)
+            .where(Ledger.id == ledger_id)
+            .returning(Ledger.record_type, Ledger.amount, Ledger.interest)
+        )
+        ledger = result.first()
+        if not ledger:
+            raise HTTPException(404, "Ledger item not found")
+
+        # Revert Asset/Liability
+        asset_delta, liability_delta = ledger_deltas(ledger.record_type, ledger.amount, ledger.interest)
+        await apply_balance_deltas(session, -asset_delta, -liability_delta)
+
+        await session.commit()
+    cache.delete_prefix("ledger", "asset", "liability")
     return {"message": "Deleted"}
 
 @app.get("/asset", response_model=Asset)
-def get_asset(session: Session = Depends(get_ledger_session)):
-    asset = session.get(Asset, 1)
-    if not asset:
-        asset = Asset(id=1, amount=0.0)
-        session.add(asset)
-        session.commit()
-        session.refresh(asset)
-    return asset
+@cached(prefix="asset", expire=300)
+async def get_asset(session: AsyncSession = Depends(get_async_session)):
+    # id=1 的单例行由启动时的 ensure_singletons 创建
+    return await session.get(Asset, 1)
 
 @app.post("/asset", response_model=Asset)
-def update_asset(payload: dict, session: Session = Depends(get_ledger_session)):
-    amount = payload.get("amount")
-    if amount is None:
-        raise HTTPException(400, "amount is required")
-    
-    asset = session.get(Asset, 1)
-    if not asset:
-        asset = Asset(id=1, amount=0.0)
-    
-    asset.amount = float(amount)
-    asset.updated_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-    session.add(asset)
-    session.commit()
-    session.refresh(asset)
+async def update_asset(payload: AmountIn, session: AsyncSession = Depends(get_async_session)):
+    async with _write_lock:
+        result = await session.exec(
+            update(Asset)
+            .where(Asset.id == 1)
+            .values(amount=payload.amount, updated_at=now_sh())
+            .returning(Asset)
+        )
+        asset = result.scalar_one()
+        await session.commit()
+    cache.delete_prefix("asset")
     return asset
 
 @app.get("/liability", response_model=Liability)
-def get_liability(session: Session = Depends(get_ledger_session)):
-    liability = session.get(Liability, 1)
-    if not liability:
-        liability = Liability(id=1, amount=0.0)
-        session.add(liability)
-        session.commit()
-        session.refresh(liability)
-    return liability
+@cached(prefix="liability", expire=300)
+async def get_liability(session: AsyncSession = Depends(get_async_session)):
+    # id=1 的单例行由启动时的 ensure_singletons 创建
+    return await session.get(Liability, 1)
 
 @app.post("/liability", response_model=Liability)
-def update_liability(payload: dict, session: Session = Depends(get_ledger_session)):
-    amount = payload.get("amount")
-    if amount is None:
-        raise HTTPException(400, "amount is required")
-    
-    liability = session.get(Liability, 1)
-    if not liability:
-        liability = Liability(id=1, amount=0.0)
-    
-    liability.amount = float(amount)
-    liability.updated_at = datetime.now(ZoneInfo("Asia/Shanghai"))
-    session.add(liability)
-    session.commit()
-    session.refresh(liability)
+async def update_liability(payload: AmountIn, session: AsyncSession = Depends(get_async_session)):
+    async with _write_lock:
+        result = await session.exec(
+            update(Liability)
+            .where(Liability.id == 1)
+            .values(amount=payload.amount, updated_at=now_sh())
+            .returning(Liability)
+        )
+        liability = result.scalar_one()
+        await session.commit()
+    cache.delete_prefix("liability")
     return liability
 
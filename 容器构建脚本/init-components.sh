@@ -2,7 +2,7 @@
 
 # 安装必要软件
 apt install -y curl nano jq bc python3 python3-pip nginx
-pip3 install --no-cache-dir --break-system-packages uvicorn fastapi sqlmodel
+pip3 install --no-cache-dir --break-system-packages uvicorn fastapi sqlmodel ciso8601 orjson aiosqlite greenlet
 
 # 获取 7z 下载链接
 latest_release_7z=$(curl -s https://api.github.com/repos/ip7z/7zip/releases/latest)